@@ -2,3 +2,14 @@ import os
 
 SCREENSHOTS_DIR = os.environ.get("SCREENSHOTS_DIR", "./screenshots/")
 CACHE_DIR = os.environ.get("CACHE_DIR", "./cache/")
+PNG_COMPRESS_LEVEL = int(os.environ.get("PNG_COMPRESS_LEVEL", 1))
+
+# Seconds browsers reuse screenshots and diff images before revalidating them by ETag
+SCREENSHOT_MAX_AGE = int(os.environ.get("SCREENSHOT_MAX_AGE", 60))
+# Only enable behind a front-end (Nginx, Apache) that handles X-Sendfile
+USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE", "0").lower() in ("1", "true", "yes")
+# Seconds without screenshot changes before a target is precomputed
+PRECOMPUTE_DELAY = float(os.environ.get("PRECOMPUTE_DELAY", 10))
+# Subsampling step for the has_diff checks behind the overview tables (1 = exact).
+# Values above 1 are faster but can miss changes smaller than the step; /compare is always exact.
+FAST_DIFF_SCALE = max(1, int(os.environ.get("FAST_DIFF_SCALE", 1)))
@@ -1,35 +1,172 @@
-from PIL import Image, ImageChops
+from PIL import Image
 import os
-import base64
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from io import BytesIO
-from config import SCREENSHOTS_DIR
+import numpy as np
+from config import CACHE_DIR, SCREENSHOTS_DIR, PNG_COMPRESS_LEVEL, FAST_DIFF_SCALE
+
+try:
+    import pyspng
+except ImportError:
+    pyspng = None
+
+def encode_png(image):
+    """Encode an image to PNG bytes."""
+    if pyspng is not None:
+        try:
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB')
+            return pyspng.encode(np.asarray(image), compress_level=PNG_COMPRESS_LEVEL)
+        except Exception:
+            pass
 
-def encode_image(image):
-    """Encode an image to a base64 string."""
     buffered = BytesIO()
-    image.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode('utf-8')
+    image.save(buffered, format="PNG", compress_level=PNG_COMPRESS_LEVEL, optimize=False)
+    return buffered.getvalue()
 
-def image_diff(src_img_path, cmp_img_path):
+def get_frame_number(filename):
+    """Extract frame number from filename."""
+    _, sep, frame_part = filename.rpartition('-')
+    if not sep:
+        return 0
+    try:
+        return int(frame_part.partition('.')[0])
+    except ValueError:
+        return 0
+
+def load_rgb_array(path):
+    """Decode an image file into an RGB uint8 array, as Image.convert('RGB') would."""
+    if pyspng is not None:
+        try:
+            with open(path, 'rb') as f:
+                arr = pyspng.load(f.read())
+            if arr.ndim == 2:
+                arr = arr[:, :, np.newaxis]
+            if arr.dtype == np.uint8:
+                channels = arr.shape[2]
+                if channels == 3:
+                    return arr
+                if channels == 4:
+                    return arr[:, :, :3]
+                if channels in (1, 2):
+                    return np.repeat(arr[:, :, :1], 3, axis=2)
+        except Exception:
+            pass
+
+    # Not a PNG, an unusual bit depth or pyspng is unavailable
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """Return the thread pool shared by all frame comparisons."""
+    return ThreadPoolExecutor(max_workers=os.cpu_count())
+
+@lru_cache(maxsize=4096)
+def _file_digest(path, mtime_ns, size):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def file_digest(path):
+    """Return the SHA-256 of a file, rehashing it only when its mtime or size changes."""
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+# content-addressed diff cache, shared across targets and requests
+def get_diff_cache_path(src_digest, cmp_digest):
+    """Generates path: cache/image_diffs/<digest[:2]>/<digest1>_<digest2>.json"""
+    first, second = sorted((src_digest, cmp_digest))
+    return os.path.join(CACHE_DIR, "image_diffs", first[:2], f"{first}_{second}.json")
+
+def load_diff_cache(src_digest, cmp_digest):
+    """Returns the cached has_diff flag for a pair of files, or None."""
+    path = get_diff_cache_path(src_digest, cmp_digest)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get('has_diff')
+    except (json.JSONDecodeError, IOError):
+        return None
+
+def save_diff_cache(src_digest, cmp_digest, has_diff):
+    path = get_diff_cache_path(src_digest, cmp_digest)
+    # Write to a temporary file first, other threads may be reading this entry
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({'has_diff': has_diff}, f)
+        os.replace(tmp_path, path)
+    except IOError as e:
+        print(f"Error saving diff cache {path}: {e}")
+
+def image_diff(src_img_path, cmp_img_path, fast=False):
     """
-    Compute the difference between two images and return the results.
+    Determine whether two images differ.
+
+    Returns a dict with a 'has_diff' flag, or an empty dict if either image
+    cannot be read. When fast is True, frames are compared at
+    1/FAST_DIFF_SCALE resolution; a change smaller than the sampling step
+    may then go unnoticed.
     """
     try:
-        src_img = Image.open(src_img_path)
-        cmp_img = Image.open(cmp_img_path)
-        diff_img = ImageChops.difference(src_img, cmp_img).convert('RGB')
-
-        has_diff = diff_img.getbbox() is not None
-
-        return {
-            'src_img_data': encode_image(src_img),
-            'cmp_img_data': encode_image(cmp_img),
-            'diff_img_data': encode_image(diff_img) if has_diff else None,
-            'has_diff': has_diff
-        }
+        src_digest = file_digest(src_img_path)
+        cmp_digest = file_digest(cmp_img_path)
+
+        # Identical files are common when a build reuses unchanged screenshots
+        has_diff = False if src_digest == cmp_digest else load_diff_cache(src_digest, cmp_digest)
+        if has_diff is not None:
+            return {'has_diff': has_diff}
+
+        # Compare in RGB, like the RGB difference image shown to the user
+        src_arr = load_rgb_array(src_img_path)
+        cmp_arr = load_rgb_array(cmp_img_path)
+
+        # Nearest-neighbour subsampling for callers that accept approximate answers
+        scale = FAST_DIFF_SCALE if fast else 1
+
+        has_diff = src_arr.shape != cmp_arr.shape
+        if not has_diff:
+            if scale > 1:
+                src_arr = src_arr[::scale, ::scale]
+                cmp_arr = cmp_arr[::scale, ::scale]
+
+            has_diff = not np.array_equal(src_arr, cmp_arr)
+
+        # A difference between sampled pixels is exact, only cache "no diff" at full resolution
+        if has_diff or scale == 1:
+            save_diff_cache(src_digest, cmp_digest, has_diff)
+
+        return {'has_diff': has_diff}
     except IOError:
         return {}
 
+def difference_image(src_arr, cmp_arr):
+    """Build the absolute difference image of two RGB arrays."""
+    # Like ImageChops.difference, diff the overlapping area of differently sized frames
+    height = min(src_arr.shape[0], cmp_arr.shape[0])
+    width = min(src_arr.shape[1], cmp_arr.shape[1])
+    diff_arr = np.abs(src_arr[:height, :width].astype(np.int16) - cmp_arr[:height, :width].astype(np.int16))
+    return Image.fromarray(diff_arr.astype(np.uint8))
+
+def diff_png(src_img_path, cmp_img_path):
+    """
+    Render the difference between two images as PNG bytes.
+
+    Returns None when the images are identical.
+    """
+    src_arr = load_rgb_array(src_img_path)
+    cmp_arr = load_rgb_array(cmp_img_path)
+
+    if src_arr.shape == cmp_arr.shape and np.array_equal(src_arr, cmp_arr):
+        return None
+    return encode_png(difference_image(src_arr, cmp_arr))
+
 def movie_diff(src_build, cmp_build, target, movie):
     """
     Compare all frames of a movie between two builds and determine if there are any differences.
@@ -51,26 +188,17 @@ def movie_diff(src_build, cmp_build, target, movie):
         return False
 
     # Get all frames for this movie in both builds
-    src_frames = [f for f in os.listdir(src_build_path)
-                  if os.path.isfile(os.path.join(src_build_path, f)) and f.startswith(f"{movie}-")]
+    prefix = movie + '-'
+    src_frames = [e.name for e in os.scandir(src_build_path)
+                  if e.name.startswith(prefix) and e.is_file()]
 
-    cmp_frames = [f for f in os.listdir(cmp_build_path)
-                  if os.path.isfile(os.path.join(cmp_build_path, f)) and f.startswith(f"{movie}-")]
+    cmp_frames = [e.name for e in os.scandir(cmp_build_path)
+                  if e.name.startswith(prefix) and e.is_file()]
 
     # If frame counts differ, there's definitely a difference
     if len(src_frames) != len(cmp_frames):
         return True
 
-    # Helper function to extract frame number from filename
-    def get_frame_number(filename):
-        parts = filename.split('-')
-        if len(parts) > 1:
-            try:
-                return int(parts[1].split('.')[0])
-            except ValueError:
-                return 0
-        return 0
-
     src_frame_map = {get_frame_number(f): f for f in src_frames}
     cmp_frame_map = {get_frame_number(f): f for f in cmp_frames}
 
@@ -79,23 +207,38 @@ def movie_diff(src_build, cmp_build, target, movie):
     if set(src_frame_map.keys()) != set(cmp_frame_map.keys()):
         return True
 
+    # Compare frames in parallel and stop at the first one that differs
+    src_dir = src_build_path + os.sep
+    cmp_dir = cmp_build_path + os.sep
+    futures = {}
     for frame_num in all_frame_numbers:
         src_frame = src_frame_map.get(frame_num)
         cmp_frame = cmp_frame_map.get(frame_num)
 
         if src_frame and cmp_frame:
-            src_img_path = os.path.join(src_build_path, src_frame)
-            cmp_img_path = os.path.join(cmp_build_path, cmp_frame)
+            src_img_path = src_dir + src_frame
+            cmp_img_path = cmp_dir + cmp_frame
+
+            future = get_executor().submit(image_diff, src_img_path, cmp_img_path, fast=True)
+            futures[future] = (src_frame, cmp_frame)
+        else:
+            for future in futures:
+                future.cancel()
+            return True
 
+    try:
+        for future in as_completed(futures):
             try:
-                diff_result = image_diff(src_img_path, cmp_img_path)
+                diff_result = future.result()
 
                 if diff_result.get('has_diff', False):
                     return True
             except Exception as e:
+                src_frame, cmp_frame = futures[future]
                 print(f"Error comparing frames {src_frame} and {cmp_frame}: {e}")
                 return True
-        else:
-            return True
+    finally:
+        for future in futures:
+            future.cancel()
 
-    return False
\ No newline at end of file
+    return False
@@ -1,12 +1,26 @@
 import os
 import json
-from PIL import Image
-from flask import Flask, render_template, jsonify, url_for, send_from_directory, request
-
-from config import CACHE_DIR,SCREENSHOTS_DIR
-from imagediff import image_diff, encode_image, movie_diff
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
+from io import BytesIO
+from flask import Flask, render_template, jsonify, url_for, send_file, send_from_directory, request
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+from config import CACHE_DIR,SCREENSHOTS_DIR, SCREENSHOT_MAX_AGE, USE_X_SENDFILE, PRECOMPUTE_DELAY
+from imagediff import image_diff, movie_diff, get_executor, get_frame_number, diff_png, file_digest
 
 app = Flask(__name__)
+app.use_x_sendfile = USE_X_SENDFILE
+
+# Builds shown per page of the target table
+PAGE_SIZE = 20
 
 # String decoding functions
 def unescape_string(s: str) -> str:
@@ -69,49 +83,15 @@ def load_target_cache(target, page):
 def save_target_cache(target, page, cache):
     """Saves the calculated data to the specific page file."""
     path = get_cache_page_path(target, page)
-    with open(path, "w") as f:
+    # Write to a temporary file first, requests and background jobs may be reading this page
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
         json.dump(cache, f)
-
-def get_frame_cache_path(target):
-    target_dir = os.path.join(CACHE_DIR, target)
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
-    return os.path.join(target_dir, "frame_diffs.json")
-
-def load_frame_cache(target):
-    path = get_frame_cache_path(target)
-    if not os.path.exists(path):
-        return {}
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except:
-        return {}
-
-def save_frame_cache(target, cache):
-    path = get_frame_cache_path(target)
-    with open(path, "w") as f:
-        json.dump(cache, f)
-
-# save string keys for frame-level diffs if needed
-def make_cache_key(target, build1, build2, movie, frame):
-    return f"{target}_{build1}_{build2}_{movie}_{frame}"
-
-def get_frame_number(filename):
-    """Extract frame number from filename."""
-    parts = filename.split('-')
-    if len(parts) > 1:
-        try:
-            return int(parts[1].rsplit('.')[0])
-        except ValueError:
-            return 0
-        
-
+    os.replace(tmp_path, path)
 
 def get_sorted_builds(target_path, reverse=True):
     """Get sorted list of builds for a target."""
-    builds = [b for b in os.listdir(target_path)
-              if os.path.isdir(os.path.join(target_path, b))]
+    builds = [e.name for e in os.scandir(target_path) if e.is_dir()]
     # Sort numerically to handle build IDs correctly (e.g., "2" < "245" < "2452")
     try:
         return sorted(builds, key=lambda x: int(x), reverse=reverse)
@@ -125,62 +105,93 @@ def collect_movie_frames(target_path, builds):
     build_movie_frames = {}
     build_files = {}
 
-    # Pre-collect file information to avoid multiple directory reads
-    for build in builds:
-        build_path = os.path.join(target_path, build)
-        build_files[build] = os.listdir(build_path)
-
-    # Process movie and frame data
+    # Read each build directory once, parsing frames as the entries come in
     for build in builds:
-        build_movie_frames[build] = {}
+        movies = build_movie_frames[build] = {}
+        files = build_files[build] = set()
 
-        for file in build_files[build]:
-            if not os.path.isfile(os.path.join(target_path, build, file)):
+        for entry in os.scandir(os.path.join(target_path, build)):
+            if not entry.is_file() or '-' not in entry.name:
                 continue
 
-            
-            movie_name, frame_part = file.rsplit("-", 1)
-            frame_num = frame_part.split('.')[0]
+            files.add(entry.name)
+            movie_name, _, frame_part = entry.name.rpartition('-')
+            frame_num = frame_part.partition('.')[0]
 
-            if movie_name not in build_movie_frames[build]:
-                build_movie_frames[build][movie_name] = []
+            if movie_name not in movies:
+                movies[movie_name] = set()
 
-            build_movie_frames[build][movie_name].append(frame_num)
+            movies[movie_name].add(frame_num)
             all_movies.add(movie_name)
 
-    return all_movies, build_movie_frames, build_files
+    # Pivot the frame sets per movie for the loops that walk builds movie by
+    # movie, freezing them so callers can intersect them directly
+    movie_build_frames = {movie_name: {} for movie_name in all_movies}
+    for build, movies in build_movie_frames.items():
+        for movie_name, frames in movies.items():
+            movie_build_frames[movie_name][build] = frozenset(frames)
 
-def find_first_build_for_movies(all_movies, builds_ascending, build_movie_frames):
+    return all_movies, movie_build_frames, build_files
+
+def find_first_build_for_movies(all_movies, builds_ascending, movie_build_frames):
     """Find the first build where each movie appears."""
     first_build_for_movie = {}
     for movie in all_movies:
+        per_build = movie_build_frames.get(movie, {})
         for build in builds_ascending:
-            if movie in build_movie_frames.get(build, {}):
+            if build in per_build:
                 first_build_for_movie[movie] = build
                 break
     return first_build_for_movie
 
-def calculate_reference_builds(all_movies, builds, build_movie_frames):
-    """Calculate reference builds for each movie in each build."""
+def calculate_reference_builds(all_movies, builds, movie_build_frames):
+    """
+    Calculate reference builds for each movie in each build.
+
+    The reference is the closest earlier build containing the movie. When the
+    current build has the movie, the reference must also share frames with it
+    and 'frames' holds the common frames.
+    """
     movie_reference_builds = {}
     for movie in all_movies:
         movie_reference_builds[movie] = {}
+        per_build = movie_build_frames.get(movie, {})
         for i, current_build in enumerate(builds):
-            has_in_current = movie in build_movie_frames.get(current_build, {})
+            current_frames = per_build.get(current_build)
 
-            if not has_in_current:
+            if current_frames is None:
+                # Reference build needs to have the movie
                 reference_build = None
-                for j in range(i+1, len(builds)):
-                    if movie in build_movie_frames.get(builds[j], {}):
+                for j in range(i-1, -1, -1):
+                    if builds[j] in per_build:
                         reference_build = builds[j]
                         break
-                movie_reference_builds[movie][current_build] = reference_build
+                movie_reference_builds[movie][current_build] = {
+                    'build': reference_build,
+                    'frames': frozenset() # Empty since current build doesn't have the movie
+                }
+            else:
+                # Current build has the movie, find a reference build with matching frames
+                reference_data = {
+                    'build': None,
+                    'frames': current_frames
+                }
+                for j in range(i-1, -1, -1):
+                    next_frames = per_build.get(builds[j])
+                    if next_frames is not None:
+                        common_frames = current_frames & next_frames
+                        if common_frames:
+                            reference_data = {
+                                'build': builds[j],
+                                'frames': common_frames
+                            }
+                            break
+                movie_reference_builds[movie][current_build] = reference_data
     return movie_reference_builds
 
 def get_movie_frames(build_path, movie_prefix=None):
     """Get all frames for a movie in a build path."""
-    all_files = [f for f in os.listdir(build_path)
-                 if os.path.isfile(os.path.join(build_path, f))]
+    all_files = [e.name for e in os.scandir(build_path) if e.is_file()]
 
     if movie_prefix:
         # Filter files for specific movie
@@ -206,8 +217,7 @@ def create_frame_map(frames):
 
 @app.route('/')
 def index():
-    targets = [d for d in os.listdir(SCREENSHOTS_DIR)
-               if os.path.isdir(os.path.join(SCREENSHOTS_DIR, d))]
+    targets = [e.name for e in os.scandir(SCREENSHOTS_DIR) if e.is_dir()]
 
     return render_template('index.html', targets=targets)
 
@@ -223,11 +233,10 @@ def target_detail(target):
 
     # Only return the page framework with build list but without table data
     page = int(request.args.get('page', 1))
-    page_size = 20
-    start = (page - 1) * page_size
-    end = start + page_size
+    start = (page - 1) * PAGE_SIZE
+    end = start + PAGE_SIZE
     paginated_builds = builds[start:end]
-    total_pages = (len(builds) + page_size - 1) // page_size
+    total_pages = (len(builds) + PAGE_SIZE - 1) // PAGE_SIZE
 
     # Load cache for this target and page
     cache_data = load_target_cache(target, page)
@@ -242,108 +251,75 @@ def target_detail(target):
 
 
 # Handle time-consuming data calculations
-@app.route('/api/target_data/<target>')
-def target_data_api(target):
-    page = int(request.args.get('page', 1))
-    page_size = 20
+def compute_target_data(target, page):
+    """
+    Compute the results table for one page of a target and store it in the page cache.
 
-    cached_data = load_target_cache(target, page)
-    if cached_data:
-        return jsonify(cached_data)
-    
+    URL templates are not part of the result, target_data_api adds them per request.
+    """
     target_path = os.path.join(SCREENSHOTS_DIR, target)
 
-    if not os.path.exists(target_path) or not os.path.isdir(target_path):
-        return jsonify({"error": "Target not found"}), 404
-
     builds = get_sorted_builds(target_path,reverse=False)
     builds_ascending = get_sorted_builds(target_path, reverse=False)
 
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
+    start_index = (page - 1) * PAGE_SIZE
+    end_index = start_index + PAGE_SIZE
     current_page_builds = builds[start_index:end_index]
     # Include previous build (from previous page) for comparison continuity
     process_start = start_index - 1 if start_index > 0 else start_index
     builds_to_process = builds[process_start:end_index + 1] if end_index < len(builds) else builds[process_start:end_index]
 
     # Collect movie frame data
-    all_movies, build_movie_frames, _ = collect_movie_frames(target_path,builds_to_process)
+    all_movies, movie_build_frames, build_files = collect_movie_frames(target_path,builds_to_process)
 
     # Calculate first build for each movie
     first_build_for_movie = find_first_build_for_movies(
-        all_movies, builds_ascending, build_movie_frames)
+        all_movies, builds_ascending, movie_build_frames)
 
     # Calculate reference builds (only for builds we're processing)
-    movie_reference_builds = {}
-    for movie in all_movies:
-        movie_reference_builds[movie] = {}
-        for i, current_build in enumerate(builds_to_process):
-            has_in_current = movie in build_movie_frames.get(current_build, {})
-            current_frames = build_movie_frames.get(current_build, {}).get(movie, [])
+    movie_reference_builds = calculate_reference_builds(all_movies, builds_to_process, movie_build_frames)
 
-            if not has_in_current:
-                 # Reference build needs to have the movie
-                reference_build = None
-                for j in range(i-1, -1, -1):
-                    next_build = builds_to_process[j]
-                    if movie in build_movie_frames.get(next_build, {}):
-                        reference_build = next_build
-                        break
-                movie_reference_builds[movie][current_build] = {
-                    'build': reference_build, 
-                    'frames': [] # Empty since current build doesn't have the movie
-                }
-            else:
-                # Current build has the movie, find a reference build with matching frames
-                reference_data = {
-                    'build': None,
-                    'frames': current_frames
-                }
-                for j in range(i-1, -1, -1):
-                    next_build = builds_to_process[j]
-                    if movie in build_movie_frames.get(next_build, {}):
-                        next_frames = build_movie_frames.get(next_build, {}).get(movie, [])
-                        common_frames = set(current_frames).intersection(set(next_frames))
-                        if common_frames:
-                            reference_data = {
-                                'build': next_build,
-                                'frames': list(common_frames)
-                            }
-                            break
-                movie_reference_builds[movie][current_build] = reference_data
-
-    def get_image_diff(current_build, prev_build, movie, frame):
-        cache_key = make_cache_key(target, current_build, prev_build, movie, frame)
-        image_diff_cache = load_frame_cache(target)
-        if cache_key in image_diff_cache:
-            return image_diff_cache[cache_key]
-
-        current_frame_path = os.path.join(target_path, current_build, f"{movie}-{frame}.png")
-        prev_frame_path = os.path.join(target_path, prev_build, f"{movie}-{frame}.png")
-
-        if os.path.exists(current_frame_path) and os.path.exists(prev_frame_path):
-            try:
-                image_diff_cache[cache_key] = image_diff(current_frame_path, prev_frame_path)
-            except Exception as e:
-                print(f"Error comparing frames {movie}-{frame}: {e}")
-                image_diff_cache[cache_key] = {'has_diff': True}
-        else:
-            image_diff_cache[cache_key] = {'has_diff': True}
-        save_frame_cache(target, image_diff_cache)
-        return image_diff_cache[cache_key]
+    def compute_image_diff(current_frame_path, prev_frame_path):
+        try:
+            return image_diff(current_frame_path, prev_frame_path, fast=True)
+        except Exception as e:
+            print(f"Error comparing frames {current_frame_path} and {prev_frame_path}: {e}")
+            return {'has_diff': True}
 
     # Modified movie difference function to only compare specified frames
     def get_movie_diff_for_frames(current_build, reference_build, target, movie, frames_to_compare):
         if not frames_to_compare:
             return False  # No frames to compare
 
-        has_any_diff = False
+        # Build everything that does not depend on the frame once
+        current_dir = os.path.join(target_path, current_build) + os.sep
+        reference_dir = os.path.join(target_path, reference_build) + os.sep
+        current_files = build_files.get(current_build, ())
+        reference_files = build_files.get(reference_build, ())
+        prefix = movie + '-'
+
+        frame_paths = []
         for frame in frames_to_compare:
-            diff_result = get_image_diff(current_build, reference_build, movie, frame)
-            if diff_result.get('has_diff', False):
+            frame_file = prefix + frame + '.png'
+
+            # Check existence against the directory listing, a missing frame is a difference
+            if frame_file not in current_files or frame_file not in reference_files:
+                return True
+
+            frame_paths.append((current_dir + frame_file, reference_dir + frame_file))
+
+        # Compare in parallel; image_diff answers repeated file pairs from its content-hash cache
+        pending = [get_executor().submit(compute_image_diff, *paths) for paths in frame_paths]
+
+        has_any_diff = False
+        for future in as_completed(pending):
+            if future.result().get('has_diff', False):
                 has_any_diff = True
                 break
 
+        for future in pending:
+            future.cancel()
+
         return has_any_diff
 
     # Pre-calculate movie difference results
@@ -373,21 +349,19 @@ def target_data_api(target):
     # Create continuous bars for visualization with updated skip logic
     for movie in movies:
         continuous_bars[movie] = []
+        per_build = movie_build_frames[movie]
 
         for i, current_build in enumerate(display_builds):
             prev_build = display_builds[i-1] if i > 0 else None
 
             is_context_build = (current_build == context_build)
-            has_in_current = movie in build_movie_frames.get(current_build, {})
-            current_frames = build_movie_frames.get(current_build, {}).get(movie, [])
+            current_frames = per_build.get(current_build, frozenset())
+            has_in_current = current_build in per_build
 
             # For the context build: check if this movie appears later in this page
             # (means it was continuous from previous page — show green, no gap)
             if is_context_build and not has_in_current:
-                movie_appears_later = any(
-                    movie in build_movie_frames.get(b, {})
-                    for b in display_builds[i+1:]
-                )
+                movie_appears_later = any(b in per_build for b in display_builds[i+1:])
                 if movie_appears_later:
                     continuous_bars[movie].append({
                         'build': current_build,
@@ -400,9 +374,7 @@ def target_data_api(target):
                     })
                 continue
 
-            prev_frames = []
-            if prev_build:
-                prev_frames = build_movie_frames.get(prev_build, {}).get(movie, [])
+            prev_frames = per_build.get(prev_build, frozenset()) if prev_build else frozenset()
 
             has_in_prev = len(prev_frames) > 0 if prev_build else False
             is_first_build = (current_build == first_build_for_movie.get(movie))
@@ -415,7 +387,7 @@ def target_data_api(target):
                 })
             elif not has_in_current and prev_build:
                 # Modified skip build logic
-                reference_data = movie_reference_builds[movie].get(current_build, {'build': None, 'frames': []})
+                reference_data = movie_reference_builds[movie].get(current_build, {'build': None, 'frames': frozenset()})
                 reference_build = reference_data['build']
 
                 if reference_build:
@@ -434,16 +406,11 @@ def target_data_api(target):
                     })
             elif has_in_current and prev_build:
                 if has_in_prev:
-                    common_frames = set(current_frames).intersection(set(prev_frames))
+                    common_frames = current_frames & prev_frames
 
                     if len(current_frames) < len(prev_frames):
                         # End difference check loop early
-                        has_any_diff = False
-                        for frame in common_frames:
-                            diff_result = get_image_diff(current_build, prev_build, movie, frame)
-                            if diff_result.get('has_diff', False):
-                                has_any_diff = True
-                                break
+                        has_any_diff = get_movie_diff_for_frames(current_build, prev_build, target, movie, common_frames)
 
                         continuous_bars[movie].append({
                             'build': current_build,
@@ -463,7 +430,7 @@ def target_data_api(target):
                         })
                 else:
                     # Modified readded build logic
-                    reference_data = movie_reference_builds[movie].get(current_build, {'build': None, 'frames': []})
+                    reference_data = movie_reference_builds[movie].get(current_build, {'build': None, 'frames': frozenset()})
                     reference_build = reference_data['build']
                     comparable_frames = reference_data['frames']
 
@@ -475,7 +442,7 @@ def target_data_api(target):
                         'build': current_build,
                         'type': 'readded',
                         'compare_with': reference_build,
-                        'common_frames': comparable_frames,
+                        'common_frames': sorted(comparable_frames),
                         'has_diff': has_diff,
                         'no_reference': reference_build is None
                     })
@@ -494,6 +461,145 @@ def target_data_api(target):
                     })
 
     # continuous_bars is now already built with display_builds in the correct order
+    data = {
+        'target': target,
+        'builds': display_builds,
+        'movies': movies,
+        'display_movies': [decode_string(m) for m in movies],
+        'continuous_bars': continuous_bars
+    }
+    save_target_cache(target, page, data)
+    return data
+
+# background precompute, shared by all requests and the screenshots watcher
+@lru_cache(maxsize=None)
+def get_background_executor():
+    """Return the thread pool running compute_target_data jobs."""
+    return ThreadPoolExecutor(thread_name_prefix="precompute")
+
+_target_jobs = {}
+_target_jobs_lock = threading.Lock()
+
+def submit_target_data(target, page, restart=False):
+    """
+    Schedule compute_target_data, joining a job already running for the same page.
+
+    With restart, a job that is already running may predate the latest
+    screenshot changes, so it is waited for and a new one is started. Do not
+    call it with restart from a get_background_executor() worker.
+    """
+    key = (target, page)
+    while True:
+        with _target_jobs_lock:
+            future = _target_jobs.get(key)
+            if future is None:
+                future = _target_jobs[key] = get_background_executor().submit(compute_target_data, target, page)
+                break
+            if not restart:
+                return future
+
+        # Any job started after this one finished already sees the new screenshots
+        wait([future])
+        restart = False
+
+    def forget_job(done):
+        with _target_jobs_lock:
+            if _target_jobs.get(key) is done:
+                del _target_jobs[key]
+
+    # Registered outside the lock, the callback runs right away if the job already finished
+    future.add_done_callback(forget_job)
+    return future
+
+def precompute_target(target, changed_builds=()):
+    """
+    Recompute the cached pages of a target after its screenshots changed.
+
+    Pages before the first changed build are kept. When a changed build is no
+    longer there (it was removed), every page is recomputed.
+    """
+    target_path = os.path.join(SCREENSHOTS_DIR, target)
+    if not os.path.isdir(target_path):
+        return
+
+    builds = get_sorted_builds(target_path, reverse=False)
+    total_pages = max(1, (len(builds) + PAGE_SIZE - 1) // PAGE_SIZE)
+
+    first_page = 1
+    if changed_builds and all(build in builds for build in changed_builds):
+        first_page = min(builds.index(build) for build in changed_builds) // PAGE_SIZE + 1
+
+    # Runs on the timer thread, a request missing the cache meanwhile joins these jobs
+    for page in range(first_page, total_pages + 1):
+        try:
+            submit_target_data(target, page, restart=True).result()
+        except Exception as e:
+            print(f"Error precomputing {target} page {page}: {e}")
+
+_pending_precompute = {}
+_pending_precompute_lock = threading.Lock()
+
+def schedule_precompute(target, build):
+    """
+    Precompute a target once its screenshots have stopped changing.
+
+    A build is usually written as many files; every change restarts the
+    PRECOMPUTE_DELAY timer so the target is only recomputed once.
+    """
+    with _pending_precompute_lock:
+        timer, builds = _pending_precompute.pop(target, (None, set()))
+        if timer is not None:
+            timer.cancel()
+        builds.add(build)
+
+        timer = threading.Timer(PRECOMPUTE_DELAY, start_precompute, (target,))
+        timer.daemon = True
+        _pending_precompute[target] = (timer, builds)
+        timer.start()
+
+def start_precompute(target):
+    with _pending_precompute_lock:
+        _, builds = _pending_precompute.pop(target, (None, set()))
+    precompute_target(target, builds)
+
+class ScreenshotsEventHandler(FileSystemEventHandler):
+    """Schedules a precompute for the target whose screenshots changed."""
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed_no_write'):
+            return
+
+        parts = os.path.relpath(event.src_path, SCREENSHOTS_DIR).split(os.sep)
+        # Only changes inside SCREENSHOTS_DIR/<target>/<build> affect results
+        if len(parts) < 2 or parts[0] in (os.curdir, os.pardir):
+            return
+        schedule_precompute(parts[0], parts[1])
+
+def start_screenshots_watcher():
+    """Watch SCREENSHOTS_DIR and precompute targets as builds arrive, if watchdog is installed."""
+    if Observer is None:
+        print("watchdog is not installed, target data is only computed on request")
+        return None
+
+    observer = Observer()
+    observer.daemon = True
+    observer.schedule(ScreenshotsEventHandler(), SCREENSHOTS_DIR, recursive=True)
+    observer.start()
+    return observer
+
+@app.route('/api/target_data/<target>')
+def target_data_api(target):
+    page = int(request.args.get('page', 1))
+
+    data = load_target_cache(target, page)
+    if not data:
+        target_path = os.path.join(SCREENSHOTS_DIR, target)
+
+        if not os.path.exists(target_path) or not os.path.isdir(target_path):
+            return jsonify({"error": "Target not found"}), 404
+
+        data = submit_target_data(target, page).result()
+
     # Generate URL templates needed by frontend
     urls = {
         'movie_url': url_for('movie', movie='MOVIE_PLACEHOLDER'),
@@ -509,16 +615,7 @@ def target_data_api(target):
     }
 
     # Return all data to frontend
-    data = {
-        'target': target,
-        'builds': display_builds,
-        'movies': movies,
-        'display_movies': [decode_string(m) for m in movies],
-        'continuous_bars': continuous_bars,
-        'urls': urls
-    }
-    save_target_cache(target, page, data)
-    return jsonify(data)
+    return jsonify(dict(data, urls=urls))
 
 @app.route('/movie/<movie>')
 def movie(movie):
@@ -527,9 +624,10 @@ def movie(movie):
     diff_matrix = {}
 
     # Scan through all targets
-    for target in os.listdir(SCREENSHOTS_DIR):
-        target_path = os.path.join(SCREENSHOTS_DIR, target)
-        if os.path.isdir(target_path):
+    for entry in os.scandir(SCREENSHOTS_DIR):
+        target = entry.name
+        target_path = entry.path
+        if entry.is_dir():
             # Get sorted builds
             builds = get_sorted_builds(target_path,reverse=False)
 
@@ -571,9 +669,10 @@ def movie(movie):
 def build(build):
     target_info = {}
 
-    for target in os.listdir(SCREENSHOTS_DIR):
-        target_path = os.path.join(SCREENSHOTS_DIR, target)
-        if not os.path.isdir(target_path):
+    for entry in os.scandir(SCREENSHOTS_DIR):
+        target = entry.name
+        target_path = entry.path
+        if not entry.is_dir():
             continue
 
         # Get sorted builds
@@ -629,27 +728,35 @@ def compare(build1, build2, target, movie):
     # For each common frame number, create a comparison entry
     frame_comparisons = []
 
-    # Process only common frames
+    # Process only common frames, diffing them in parallel
+    futures = []
     for frame_num in common_frame_numbers:
+        img1_path = os.path.join(build1_path, build1_frame_map[frame_num])
+        img2_path = os.path.join(build2_path, build2_frame_map[frame_num])
+        futures.append(get_executor().submit(image_diff, img1_path, img2_path))
+
+    for frame_num, future in zip(common_frame_numbers, futures):
         build1_frame = build1_frame_map.get(frame_num)
         build2_frame = build2_frame_map.get(frame_num)
 
+        # The browser fetches the images itself, the page only carries URLs
         comparison = {
             'frame_number': frame_num,
             'build1_frame': build1_frame,
             'build2_frame': build2_frame,
-            'has_diff': False,
-            'diff_data': None
+            'build1_url': url_for('screenshots', filename=f"{target}/{build1}/{build1_frame}"),
+            'build2_url': url_for('screenshots', filename=f"{target}/{build2}/{build2_frame}"),
+            'diff_url': None,
+            'has_diff': False
         }
 
-        # Calculate diff
-        img1_path = os.path.join(build1_path, build1_frame)
-        img2_path = os.path.join(build2_path, build2_frame)
-
+        # Collect diff
         try:
-            diff_result = image_diff(img1_path, img2_path)
+            diff_result = future.result()
             comparison['has_diff'] = diff_result.get('has_diff', False)
-            comparison['diff_data'] = diff_result
+            if comparison['has_diff']:
+                comparison['diff_url'] = url_for('diff_image', target=target, build1=build1,
+                                                 build2=build2, movie=movie, frame=frame_num)
         except Exception as e:
             print(f"Error comparing images: {e}")
 
@@ -669,6 +776,40 @@ def compare(build1, build2, target, movie):
                            comparisons=frame_comparisons,
                            stats=stats)
 
+@app.route('/diff/<target>/<build1>/<build2>/<movie>/<int:frame>')
+def diff_image(target, build1, build2, movie, frame):
+    """
+    Render the difference of one frame between two builds as a PNG.
+    """
+    build1_path = os.path.join(SCREENSHOTS_DIR, target, build1)
+    build2_path = os.path.join(SCREENSHOTS_DIR, target, build2)
+
+    try:
+        build1_frame = create_frame_map(get_movie_frames(build1_path, movie)).get(frame)
+        build2_frame = create_frame_map(get_movie_frames(build2_path, movie)).get(frame)
+    except OSError:
+        return "Build not found", 404
+
+    if not build1_frame or not build2_frame:
+        return "Frame not found", 404
+
+    img1_path = os.path.join(build1_path, build1_frame)
+    img2_path = os.path.join(build2_path, build2_frame)
+
+    # The diff only changes when either screenshot does
+    etag = f"{file_digest(img1_path)}-{file_digest(img2_path)}"
+    if etag in request.if_none_match:
+        return "", 304, {'ETag': f'"{etag}"'}
+
+    png_bytes = diff_png(img1_path, img2_path)
+    if png_bytes is None:
+        return "No difference", 404
+
+    response = send_file(BytesIO(png_bytes), mimetype='image/png', etag=etag, max_age=SCREENSHOT_MAX_AGE,
+                         last_modified=max(os.path.getmtime(img1_path), os.path.getmtime(img2_path)))
+    response.cache_control.public = True
+    return response
+
 @app.route('/view/<target>/<build>/<movie>')
 def view_single_build(target, build, movie):
     """
@@ -677,23 +818,14 @@ def view_single_build(target, build, movie):
     build_path = os.path.join(SCREENSHOTS_DIR, target, build)
     frames = get_movie_frames(build_path, movie)
 
-    # Prepare frame data for the template
+    # Prepare frame data for the template, the browser fetches the files itself
     frame_data = []
     for frame in frames:
-        frame_path = os.path.join(build_path, frame)
-        frame_num = get_frame_number(frame)
-
-        try:
-            img = Image.open(frame_path)
-            img_data = encode_image(img)
-
-            frame_data.append({
-                'frame_number': frame_num,
-                'filename': frame,
-                'img_data': img_data
-            })
-        except Exception as e:
-            print(f"Error processing frame {frame}: {e}")
+        frame_data.append({
+            'frame_number': get_frame_number(frame),
+            'filename': frame,
+            'img_url': url_for('screenshots', filename=f"{target}/{build}/{frame}")
+        })
 
     return render_template('view.html',
                            target=target,
@@ -703,7 +835,14 @@ def view_single_build(target, build, movie):
 
 @app.route('/screenshots/<path:filename>')
 def screenshots(filename):
-    return send_from_directory(SCREENSHOTS_DIR, filename)
+    # send_from_directory adds an mtime based ETag and answers conditional requests,
+    # so a frame rewritten in place is picked up once max-age runs out
+    response = send_from_directory(SCREENSHOTS_DIR, filename, max_age=SCREENSHOT_MAX_AGE)
+    response.cache_control.public = True
+    return response
 
 if __name__ == '__main__':
+    # The reloader runs the app in a child process, only that one watches screenshots
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_screenshots_watcher()
     app.run(debug=True, port=5001)